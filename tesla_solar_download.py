@@ -16,63 +16,279 @@ limitations under the License.
 
 import argparse
 import csv
+import io
+import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
+from zoneinfo import ZoneInfo
+
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Number of API requests to keep in flight at once.
+DEFAULT_CONCURRENCY = 8
+# Write buffer for CSV files, large enough to hold a whole day/month.
+CSV_BUFFER_SIZE = 1 << 16
+# Compression level for --compress.
+ZSTD_LEVEL = 3
+# Sustained API request rate and the burst allowed on top of it.
+REQUESTS_PER_MINUTE = 60
+REQUEST_BURST = 10
+# Times a request is retried after a 429 Too Many Requests response.
+RATE_LIMITED_RETRIES = 5
+# Seconds of validity left for a token refreshed by another thread to be reused.
+TOKEN_REFRESH_MARGIN = 60
+
+
+class _RateLimiter:
+    """Token bucket limiting the rate of API requests across threads.
+
+    When the server responds with 429 Too Many Requests, requests pause for the
+    Retry-After period and the rate is halved (down to 1/8 of the configured
+    rate); it is restored after `recovery` successful requests.
+    """
+
+    def __init__(
+        self, per_minute=REQUESTS_PER_MINUTE, burst=REQUEST_BURST, recovery=30
+    ):
+        self.max_rate = per_minute / 60
+        self.min_rate = self.max_rate / 8
+        self.rate = self.max_rate
+        self.burst = burst
+        self.recovery = recovery
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._resume_at = 0
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if now >= self._resume_at and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._resume_at - now, (1 - self._tokens) / self.rate)
+            # Sleep without the lock so a throttled() call takes effect right away.
+            time.sleep(wait)
+
+    def succeeded(self):
+        with self._lock:
+            self._successes += 1
+            if self.rate < self.max_rate and self._successes >= self.recovery:
+                self.rate = self.max_rate
+
+    def throttled(self, retry_after=None):
+        with self._lock:
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = 1 / self.max_rate
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+            self._tokens = 0
+            self.rate = max(self.rate / 2, self.min_rate)
+            self._successes = 0
+
+
+class _Retry(Retry):
+    # urllib3 retries these statuses whenever they carry a Retry-After header,
+    # even if they aren't in status_forcelist.  Leave 429s to the _RateLimiter.
+    RETRY_AFTER_STATUS_CODES = frozenset({413, 503})
+
+
+def _download_concurrently(jobs, concurrency):
+    """Run (label, fetch, write) jobs: fetch() on a bounded thread pool, then
+    write(result) on this thread as each fetch completes, so writing CSV files
+    overlaps with the API requests still in flight.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(fetch): (label, write) for label, fetch, write in jobs
+        }
+        try:
+            for future in as_completed(futures):
+                label, write = futures.pop(future)
+                write(future.result())
+                print(f'  {label}')
+        except BaseException:
+            # Stop on the first error or Ctrl-C: drop the queued requests and only
+            # wait for the ones already in flight.
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def _serialize_token_refresh(tesla):
+    """Make download threads that find the token expired refresh it one at a
+    time, so it is refreshed (and teslapy's cache.json rewritten) only once.
+    """
+    lock = threading.Lock()
+    refresh_token = tesla.refresh_token
+
+    def locked_refresh_token(*args, **kwargs):
+        with lock:
+            # Another thread may have refreshed it while we were waiting.
+            if (tesla.expires_at or 0) > time.time() + TOKEN_REFRESH_MARGIN:
+                return tesla.token
+            return refresh_token(*args, **kwargs)
+
+    tesla.refresh_token = locked_refresh_token
+
+
+def _decode_with_orjson(response, *args, **kwargs):
+    """Response hook that decodes calendar history responses with orjson, which
+    is several times faster than the json module for these large payloads.
+    """
+    if '/calendar_history' in response.url:
+        response.json = lambda **kwargs: orjson.loads(response.content)
+    return response
+
+
+def _calendar_history(tesla, limiter, site_id, **params):
+    for attempt in range(RATE_LIMITED_RETRIES + 1):
+        limiter.acquire()
+        try:
+            response = tesla.api(
+                'CALENDAR_HISTORY_DATA', path_vars={'site_id': site_id}, **params
+            )
+        except requests.HTTPError as e:
+            if e.response.status_code != 429 or attempt == RATE_LIMITED_RETRIES:
+                raise
+            limiter.throttled(e.response.headers.get('Retry-After'))
+            continue
+        limiter.succeeded()
+        return response['response']
+
+
+def _open_csv(csv_filename, compress=False):
+    if not compress:
+        return open(csv_filename, 'w', buffering=CSV_BUFFER_SIZE)
+    # Optional dependency, only needed with --compress.
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return io.TextIOWrapper(
+        compressor.stream_writer(open(csv_filename, 'wb')), encoding='utf-8'
+    )
 
-import pytz
-import teslapy
-from dateutil.parser import parse
-from retry import retry
 
+def _is_downloaded(csv_name, downloaded):
+    name = os.path.basename(csv_name)
+    return name in downloaded or f'{name}.zst' in downloaded
 
-def _get_energy_csv_name(date, site_id, partial_month=False):
-    str_date = date.strftime('%Y-%m')
-    suffix = '.partial.csv' if partial_month else '.csv'
-    return f'download/{site_id}/energy/{str_date}{suffix}'
 
+def _list_dir(dir):
+    """Return the file names in dir (empty if the directory doesn't exist)."""
+    try:
+        with os.scandir(dir) as entries:
+            return frozenset(entry.name for entry in entries)
+    except FileNotFoundError:
+        return frozenset()
 
-def _write_energy_csv(timeseries, date, site_id, partial_month=False):
-    if not timeseries:
-        raise ValueError('No timeseries')
 
-    csv_filename = _get_energy_csv_name(date, site_id, partial_month=partial_month)
-    os.makedirs(os.path.dirname(csv_filename), exist_ok=True)
-    fieldnames = list(timeseries[0].keys())
-    with open(csv_filename, 'w') as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-        writer.writeheader()
-        for ts in timeseries:
-            ts['timestamp'] = parse(ts['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-            writer.writerow(ts)
+def _format_timestamp(timestamp):
+    # API timestamps are ISO 8601 in the site's local time (e.g.
+    # 2023-05-23T10:25:00-07:00); keep the date and time, drop the offset.
+    return f'{timestamp[:10]} {timestamp[11:19]}'
 
 
-@retry(tries=2, delay=5)
-def _download_energy_month(
-    tesla, site_id, timezone, start_date, end_date, partial_month=False
-):
-    response = tesla.api(
-        'CALENDAR_HISTORY_DATA',
-        path_vars={'site_id': site_id},
+def _get_state_name(site_id):
+    return f'download/{site_id}/.state.json'
+
+
+def _read_state(site_id):
+    # A missing or unreadable state file just means a full directory scan.
+    try:
+        with open(_get_state_name(site_id)) as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _update_state(site_id, **values):
+    state = _read_state(site_id)
+    state.update(values)
+    # Write a temporary file and rename it over the old one, so an interrupted
+    # write can't leave a truncated state file behind.
+    state_name = _get_state_name(site_id)
+    with open(f'{state_name}.tmp', 'w') as state_file:
+        json.dump(state, state_file)
+    os.replace(f'{state_name}.tmp', state_name)
+
+
+def _delete_partial_files(dir):
+    try:
+        with os.scandir(dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(('.partial.csv', '.partial.csv.zst')):
+                    os.remove(entry.path)
+    except FileNotFoundError:
+        pass
+
+
+def _get_energy_csv_name(date, site_id, partial_month=False, compress=False):
+    str_date = date.strftime('%Y-%m')
+    suffix = '.partial.csv' if partial_month else '.csv'
+    if compress:
+        suffix += '.zst'
+    return f'download/{site_id}/energy/{str_date}{suffix}'
+
+
+def _write_energy_csv(timeseries, date, site_id, partial_month=False, compress=False):
+    csv_filename = _get_energy_csv_name(
+        date, site_id, partial_month=partial_month, compress=compress
+    )
+    fieldnames = [key for key in timeseries[0] if key != 'timestamp']
+    get_values = itemgetter(*fieldnames)
+    rows = ((_format_timestamp(ts['timestamp']), *get_values(ts)) for ts in timeseries)
+    with _open_csv(csv_filename, compress=compress) as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['timestamp'] + fieldnames)
+        writer.writerows(rows)
+
+
+def _fetch_energy_month(tesla, limiter, site_id, timezone, start_date, end_date):
+    response = _calendar_history(
+        tesla,
+        limiter,
+        site_id,
         kind='energy',
         period='month',
         start_date=start_date.isoformat(),
         end_date=end_date.isoformat(),
         time_zone=timezone,
         fill_telemetry=0,
-    )['response']
-
-    _write_energy_csv(
-        response['time_series'], start_date, site_id, partial_month=partial_month
     )
 
+    if not response['time_series']:
+        raise ValueError(f'No timeseries for {start_date}')
+    return response['time_series']
 
-def _download_energy_data(tesla, site_id, debug=False):
-    site_config = tesla.api('SITE_CONFIG', path_vars={'site_id': site_id})['response']
-    installation_date = parse(site_config['installation_date'])
-    timezone = site_config['installation_time_zone']
 
-    now = datetime.now(pytz.timezone(timezone)).replace(microsecond=0)
+def _download_energy_data(
+    tesla,
+    limiter,
+    site_id,
+    installation_date,
+    timezone,
+    concurrency=DEFAULT_CONCURRENCY,
+    compress=False,
+    debug=False,
+):
+    now = datetime.now(ZoneInfo(timezone)).replace(microsecond=0)
     start_date = now.replace(hour=0, minute=0, second=0)
     end_date = now.replace(hour=23, minute=59, second=59)
 
@@ -84,98 +300,161 @@ def _download_energy_data(tesla, site_id, debug=False):
 
     # The latest month will be partial.
     partial_month = True
+    # Last month is complete once this run succeeds.
+    complete_month = (start_date - timedelta(days=1)).strftime('%Y-%m')
+    # All months up to this one were downloaded by an earlier run.
+    last_complete_month = _read_state(site_id).get('energy_last_complete_month')
+
+    # List existing files once rather than checking each month separately.
+    downloaded = _list_dir(f'download/{site_id}/energy')
+    os.makedirs(f'download/{site_id}/energy', exist_ok=True)
 
+    jobs = []
     while end_date > installation_date:
+        if last_complete_month and start_date.strftime('%Y-%m') <= last_complete_month:
+            break
         csv_name = _get_energy_csv_name(start_date, site_id)
-        if partial_month or not os.path.exists(
-            _get_energy_csv_name(start_date, site_id)
-        ):
-            print(f'  {os.path.basename(csv_name)}')
-            _download_energy_month(
-                tesla,
-                site_id,
-                timezone,
-                start_date,
-                end_date,
-                partial_month=partial_month,
+        if partial_month or not _is_downloaded(csv_name, downloaded):
+            jobs.append(
+                (
+                    os.path.basename(csv_name),
+                    partial(
+                        _fetch_energy_month,
+                        tesla,
+                        limiter,
+                        site_id,
+                        timezone,
+                        start_date,
+                        end_date,
+                    ),
+                    partial(
+                        _write_energy_csv,
+                        date=start_date,
+                        site_id=site_id,
+                        partial_month=partial_month,
+                        compress=compress,
+                    ),
+                )
             )
-            time.sleep(1)
         partial_month = False
         end_date = start_date - timedelta(seconds=1)
         start_date = end_date.replace(hour=0, minute=0, second=0) - timedelta(
             days=end_date.day - 1
         )
-        start_date = pytz.timezone(timezone).localize(start_date.replace(tzinfo=None))
+
+    if not jobs:
+        return
+    _download_concurrently(jobs, concurrency)
+    _update_state(site_id, energy_last_complete_month=complete_month)
 
 
 def _delete_partial_energy_files(site_id):
-    dir = os.path.join('download', str(site_id), 'energy')
-    if not os.path.exists(dir):
-        return
-    for fname in os.listdir(dir):
-        if '.partial.csv' in fname:
-            os.remove(os.path.join(dir, fname))
+    _delete_partial_files(os.path.join('download', str(site_id), 'energy'))
 
 
-def _get_power_csv_name(date, site_id, partial_day=False):
+def _get_power_csv_name(date, site_id, partial_day=False, compress=False):
     str_date = date.strftime('%Y-%m-%d')
     suffix = '.partial.csv' if partial_day else '.csv'
+    if compress:
+        suffix += '.zst'
     return f'download/{site_id}/power/{str_date}{suffix}'
 
 
-def _write_power_csv(timeseries, date, site_id, partial_day=False):
-    if not timeseries:
-        raise ValueError(f'No timeseries for {date}')
-
-    csv_filename = _get_power_csv_name(date, site_id, partial_day=partial_day)
-    os.makedirs(os.path.dirname(csv_filename), exist_ok=True)
-    fieldnames = list(timeseries[0].keys()) + ['load_power']
-    with open(csv_filename, 'w') as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-        writer.writeheader()
-        for ts in timeseries:
-            ts['timestamp'] = parse(ts['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-            ts['load_power'] = (
-                ts['solar_power']
-                + ts['battery_power']
-                + ts['grid_power']
-                + ts['generator_power']
-            )
-            writer.writerow(ts)
-
-
-@retry(tries=2, delay=5)
-def _download_power_day(tesla, site_id, timezone, date, partial_day=True):
-    start_date = (
-        pytz.timezone(timezone)
-        .localize(date.replace(hour=0, minute=0, second=0, tzinfo=None))
-        .isoformat()
+def _write_power_csv(timeseries, date, site_id, partial_day=False, compress=False):
+    csv_filename = _get_power_csv_name(
+        date, site_id, partial_day=partial_day, compress=compress
     )
-    end_date = (
-        pytz.timezone(timezone)
-        .localize(date.replace(hour=23, minute=59, second=59, tzinfo=None))
-        .isoformat()
+    fieldnames = [key for key in timeseries[0] if key != 'timestamp']
+    get_values = itemgetter(*fieldnames)
+    # load_power is summed per row in Python, not with NumPy: the result keeps the
+    # API's int/float values (e.g. 0 rather than 0.0) and full float precision.
+    rows = (
+        (
+            _format_timestamp(ts['timestamp']),
+            *get_values(ts),
+            ts['solar_power']
+            + ts['battery_power']
+            + ts['grid_power']
+            + ts['generator_power'],
+        )
+        for ts in timeseries
     )
-    response = tesla.api(
-        'CALENDAR_HISTORY_DATA',
-        path_vars={'site_id': site_id},
+    with _open_csv(csv_filename, compress=compress) as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['timestamp'] + fieldnames + ['load_power'])
+        writer.writerows(rows)
+
+
+def _write_power_days(timeseries_by_day, days, site_id, compress=False):
+    for date, partial_day in days:
+        _write_power_csv(
+            timeseries_by_day[date.strftime('%Y-%m-%d')],
+            date,
+            site_id,
+            partial_day=partial_day,
+            compress=compress,
+        )
+
+
+def _fetch_power_days(tesla, limiter, site_id, timezone, dates):
+    """Fetch power data for consecutive dates (newest first) in one request and
+    return it grouped by day.
+    """
+    start_date = dates[-1].replace(hour=0, minute=0, second=0).isoformat()
+    end_date = dates[0].replace(hour=23, minute=59, second=59).isoformat()
+    response = _calendar_history(
+        tesla,
+        limiter,
+        site_id,
         kind='power',
         period='day',
         start_date=start_date,
         end_date=end_date,
         time_zone=timezone,
         fill_telemetry=0,
-    )['response']
-
-    _write_power_csv(response['time_series'], date, site_id, partial_day=partial_day)
-
-
-def _download_power_data(tesla, site_id, debug=False):
-    site_config = tesla.api('SITE_CONFIG', path_vars={'site_id': site_id})['response']
-    installation_date = parse(site_config['installation_date'])
-    timezone = site_config['installation_time_zone']
+    )
 
-    date = datetime.now(pytz.timezone(timezone)).replace(
+    timeseries_by_day = {
+        day: list(timeseries)
+        for day, timeseries in groupby(
+            response['time_series'], key=lambda ts: ts['timestamp'][:10]
+        )
+    }
+    for date in dates:
+        if date.strftime('%Y-%m-%d') not in timeseries_by_day:
+            raise ValueError(f'No timeseries for {date}')
+    return timeseries_by_day
+
+
+def _group_days(days, days_per_request):
+    """Split (date, partial_day) pairs, newest first, into runs of at most
+    days_per_request consecutive days.
+    """
+    group = []
+    for day in days:
+        if group and (
+            len(group) == days_per_request
+            or group[-1][0].date() - day[0].date() != timedelta(days=1)
+        ):
+            yield group
+            group = []
+        group.append(day)
+    if group:
+        yield group
+
+
+def _download_power_data(
+    tesla,
+    limiter,
+    site_id,
+    installation_date,
+    timezone,
+    concurrency=DEFAULT_CONCURRENCY,
+    days_per_request=1,
+    compress=False,
+    debug=False,
+):
+    date = datetime.now(ZoneInfo(timezone)).replace(
         hour=0, minute=0, second=0, microsecond=0
     )
     if debug:
@@ -184,27 +463,72 @@ def _download_power_data(tesla, site_id, debug=False):
 
     # The first day (today) will be partial.
     partial_day = True
+    # Yesterday is complete once this run succeeds.
+    complete_date = (date - timedelta(days=1)).strftime('%Y-%m-%d')
+    # All days up to this one were downloaded by an earlier run.
+    last_complete_date = _read_state(site_id).get('power_last_complete_date')
 
+    # List existing files once rather than checking each day separately.
+    downloaded = _list_dir(f'download/{site_id}/power')
+    os.makedirs(f'download/{site_id}/power', exist_ok=True)
+
+    days = []
     while date > installation_date:
+        if last_complete_date and date.strftime('%Y-%m-%d') <= last_complete_date:
+            break
         csv_name = _get_power_csv_name(date, site_id)
-        if partial_day or not os.path.exists(csv_name):
-            print(f'  {os.path.basename(csv_name)}')
-            _download_power_day(tesla, site_id, timezone, date, partial_day=partial_day)
-            time.sleep(1)
+        if partial_day or not _is_downloaded(csv_name, downloaded):
+            days.append((date, partial_day))
         date -= timedelta(days=1)
         partial_day = False
-        # Re-localize the date based on the timezone.  This is important because we maybe have
-        # crossed a daylight saving change so the timezone offset will be different.
-        date = pytz.timezone(timezone).localize(date.replace(tzinfo=None))
+
+    if not days:
+        return
+    jobs = []
+    for group in _group_days(days, days_per_request):
+        dates = [date for date, _ in group]
+        label = os.path.basename(_get_power_csv_name(dates[0], site_id))
+        if len(dates) > 1:
+            first = os.path.basename(_get_power_csv_name(dates[-1], site_id))
+            label = f'{first} - {label}'
+        jobs.append(
+            (
+                label,
+                partial(_fetch_power_days, tesla, limiter, site_id, timezone, dates),
+                partial(
+                    _write_power_days,
+                    days=group,
+                    site_id=site_id,
+                    compress=compress,
+                ),
+            )
+        )
+    _download_concurrently(jobs, concurrency)
+    _update_state(site_id, power_last_complete_date=complete_date)
 
 
 def _delete_partial_power_files(site_id):
-    dir = os.path.join('download', str(site_id), 'power')
-    if not os.path.exists(dir):
-        return
-    for fname in os.listdir(dir):
-        if '.partial.csv' in fname:
-            os.remove(os.path.join(dir, fname))
+    _delete_partial_files(os.path.join('download', str(site_id), 'power'))
+
+
+def _get_site_config(tesla, site_id):
+    site_config = tesla.api('SITE_CONFIG', path_vars={'site_id': site_id})['response']
+    # ISO 8601 with a UTC offset; fromisoformat only accepts 'Z' from Python 3.11.
+    installation_date = datetime.fromisoformat(
+        site_config['installation_date'].replace('Z', '+00:00')
+    )
+    timezone = site_config['installation_time_zone']
+    return installation_date, timezone
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be a positive integer: {value}')
+    return number
 
 
 def main():
@@ -214,10 +538,63 @@ def main():
     parser.add_argument(
         '--email', type=str, required=True, help='Tesla account email address'
     )
+    parser.add_argument(
+        '--concurrency',
+        type=_positive_int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Number of concurrent API requests (default: {DEFAULT_CONCURRENCY})',
+    )
+    parser.add_argument(
+        '--requests-per-minute',
+        type=_positive_int,
+        default=REQUESTS_PER_MINUTE,
+        help=f'Maximum API request rate (default: {REQUESTS_PER_MINUTE})',
+    )
+    parser.add_argument(
+        '--days-per-request',
+        type=_positive_int,
+        default=1,
+        help='Number of days of power data to fetch per API request (default: 1)',
+    )
+    parser.add_argument(
+        '--compress',
+        action='store_true',
+        help='Write zstd-compressed .csv.zst files (requires the zstandard package)',
+    )
     parser.add_argument('--debug', action='store_true', help='Print debug info')
     args = parser.parse_args()
-
-    tesla = teslapy.Tesla(args.email, retry=2, timeout=10)
+    if args.compress:
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            parser.error('--compress requires zstandard: pip install zstandard')
+
+    # Imported here so --help and argument errors don't wait for it to load.
+    import teslapy
+
+    tesla = teslapy.Tesla(args.email, timeout=10)
+    # Keep a connection per download thread alive and retry transient errors with
+    # exponential backoff.  429 responses are not retried here (see _Retry) but
+    # raised to _calendar_history, which slows all threads down via the
+    # _RateLimiter.
+    tesla.mount(
+        'https://',
+        HTTPAdapter(
+            pool_maxsize=args.concurrency,
+            max_retries=_Retry(
+                total=5,
+                backoff_factor=1.0,
+                status_forcelist=[500, 502, 503, 504],
+                allowed_methods=['GET', 'POST'],
+                # Wait as long as a 503 asks to.  Any status in
+                # _Retry.RETRY_AFTER_STATUS_CODES that carries the header is
+                # retried, even if it's not in status_forcelist.
+                respect_retry_after_header=True,
+            ),
+        ),
+    )
+    tesla.hooks['response'].append(_decode_with_orjson)
+    _serialize_token_refresh(tesla)
     if not tesla.authorized:
         print('STEP 1: Log in to Tesla.  Open this page in your browser:\n')
         print(tesla.authorization_url())
@@ -229,23 +606,44 @@ def main():
         tesla.fetch_token(authorization_response=input('URL after authentication: '))
         print('\nSuccess!')
 
+    limiter = _RateLimiter(per_minute=args.requests_per_minute)
     for product in tesla.api('PRODUCT_LIST')['response']:
         resource_type = product.get('resource_type')
         if resource_type in ('battery', 'solar'):
             site_id = product['energy_site_id']
             obfuscated_site_it = f'***{str(site_id)[-4:]}'
+            installation_date, timezone = _get_site_config(tesla, site_id)
             print(
                 f'Downloading energy data for {resource_type} site {obfuscated_site_it} to download/energy/'
             )
             _delete_partial_energy_files(site_id)
-            _download_energy_data(tesla, site_id, debug=args.debug)
+            _download_energy_data(
+                tesla,
+                limiter,
+                site_id,
+                installation_date,
+                timezone,
+                concurrency=args.concurrency,
+                compress=args.compress,
+                debug=args.debug,
+            )
             print()
 
             print(
                 f'Downloading power data for {resource_type} site {obfuscated_site_it} to download/power/'
             )
             _delete_partial_power_files(site_id)
-            _download_power_data(tesla, site_id, debug=args.debug)
+            _download_power_data(
+                tesla,
+                limiter,
+                site_id,
+                installation_date,
+                timezone,
+                concurrency=args.concurrency,
+                days_per_request=args.days_per_request,
+                compress=args.compress,
+                debug=args.debug,
+            )
 
 
 if __name__ == '__main__':